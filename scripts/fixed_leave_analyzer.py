@@ -10,34 +10,62 @@ from reportlab.lib.units import inch, cm
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 import os
+import sqlite3
+from leave_history import LeaveHistoryStore
+from turkish_font import register_turkish_font
 
 class FlexibleLeaveAnalyzer:
     def __init__(self):
         self.df = None
         self.column_mapping = {}
+        self.snapshot_id = None
+        self.history = None
         self.setup_gui()
         # Register Turkish font for PDF
         self.setup_turkish_font()
+        self.setup_history_store()
+    
+    def setup_history_store(self):
+        """Open the SQLite history store next to the script"""
+        try:
+            self.history = LeaveHistoryStore()
+        except sqlite3.Error as e:
+            self.history = None
+            self.log(f"⚠️ Geçmiş veritabanı açılamadı, geçmiş kaydedilmeyecek: {str(e)}")
+    
+    def on_close(self):
+        """Close the history store before the window is destroyed"""
+        if self.history is not None:
+            try:
+                self.history.close()
+            except sqlite3.Error:
+                pass
+            self.history = None
+        self.root.destroy()
     
     def setup_turkish_font(self):
         """Setup Turkish font support for PDF"""
+        # Fallback to Helvetica; ş, ğ, ı will not render correctly
+        self.turkish_font = 'Helvetica'
         try:
-            # Try to register a Turkish-compatible font
+            # Searches the script folder, working folder and system font folders
             # You can download DejaVuSans.ttf and put it in the same folder
-            font_path = "DejaVuSans.ttf"
-            if os.path.exists(font_path):
-                pdfmetrics.registerFont(TTFont('DejaVuSans', font_path))
-                self.turkish_font = 'DejaVuSans'
-            else:
-                # Fallback to Helvetica with proper encoding
-                self.turkish_font = 'Helvetica'
-        except:
-            self.turkish_font = 'Helvetica'
+            font_name = register_turkish_font()
+        except Exception as e:
+            self.log(f"⚠️ Türkçe yazı tipi yüklenemedi, Helvetica kullanılacak: {str(e)}")
+            return
+
+        if font_name:
+            self.turkish_font = font_name
+        else:
+            self.log("⚠️ Türkçe yazı tipi bulunamadı (DejaVuSans.ttf), Helvetica kullanılacak. "
+                     "PDF'te ş, ğ, ı karakterleri bozuk görünebilir.")
     
     def setup_gui(self):
         self.root = tk.Tk()
         self.root.title("Esnek İzin Analiz Sistemi")
         self.root.geometry("800x700")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Main frame
         main_frame = ttk.Frame(self.root, padding="15")
@@ -90,6 +118,10 @@ class FlexibleLeaveAnalyzer:
                   command=self.analyze_data, style='Accent.TButton').pack(side=tk.LEFT, padx=5)
         ttk.Button(report_frame, text="📄 PDF Rapor Oluştur", 
                   command=self.generate_report).pack(side=tk.LEFT, padx=5)
+        ttk.Button(report_frame, text="🕘 Geçmiş Kayıtla Karşılaştır", 
+                  command=self.compare_with_snapshot).pack(side=tk.LEFT, padx=5)
+        ttk.Button(report_frame, text="📚 Geçmiş İzinler", 
+                  command=self.show_leaves_in_period).pack(side=tk.LEFT, padx=5)
         
         # Status and results area
         results_frame = ttk.LabelFrame(main_frame, text="Sonuçlar ve Durum", padding="10")
@@ -231,8 +263,26 @@ class FlexibleLeaveAnalyzer:
             self.log(f"  • {key}: {col}")
         
         self.mapping_frame.pack_forget()
+        self.save_snapshot()
         self.status_var.set("✅ Sütun eşleştirmesi tamamlandı - Analiz yapabilirsiniz")
     
+    def save_snapshot(self):
+        """Save the imported roster and its leaves to the history store"""
+        self.snapshot_id = None
+        if self.history is None:
+            return
+        
+        try:
+            snapshot_id, version, is_new = self.history.save_snapshot(
+                self.df, self.column_mapping, self.file_path_var.get())
+            self.snapshot_id = snapshot_id
+            if is_new:
+                self.log(f"💾 Geçmişe kaydedildi: sürüm {version}")
+            else:
+                self.log(f"💾 Değişiklik yok, mevcut sürüm {version} kullanılıyor")
+        except Exception as e:
+            self.log(f"⚠️ Geçmişe kaydedilemedi: {str(e)}")
+    
     def load_data(self):
         if not self.file_path_var.get():
             messagebox.showerror("Hata", "Lütfen bir Excel dosyası seçin!")
@@ -245,6 +295,7 @@ class FlexibleLeaveAnalyzer:
             
             # Load Excel file
             self.df = pd.read_excel(self.file_path_var.get())
+            self.snapshot_id = None
             
             self.log(f"✅ Toplam {len(self.df)} kayıt yüklendi")
             self.log("\n📋 Bulunan sütunlar:")
@@ -387,6 +438,16 @@ class FlexibleLeaveAnalyzer:
                 else:
                     self.log(f"   ⚠️ Hiç çalışan yok!")
             
+            if self.history is not None and self.snapshot_id is not None:
+                try:
+                    analysis_id, is_new = self.history.save_analysis(
+                        self.snapshot_id, start_date, end_date, self.weekly_data)
+                    if is_new:
+                        self.log(f"\n💾 Analiz sonuçları geçmişe kaydedildi")
+                    self.log_analysis_comparison(analysis_id)
+                except Exception as e:
+                    self.log(f"\n⚠️ Analiz sonuçları kaydedilemedi: {str(e)}")
+            
             self.log(f"\n✅ Analiz tamamlandı! PDF rapor oluşturabilirsiniz.")
             self.status_var.set("✅ Analiz tamamlandı - PDF rapor oluşturabilirsiniz")
             
@@ -396,6 +457,124 @@ class FlexibleLeaveAnalyzer:
             messagebox.showerror("Hata", error_msg)
             self.status_var.set("❌ Analiz hatası")
     
+    def log_analysis_comparison(self, analysis_id):
+        """Log weekly counts next to the previous stored analysis of the same period"""
+        previous_id = self.history.previous_analysis(analysis_id)
+        if previous_id is None:
+            return
+        
+        self.log(f"\n🕘 AYNI DÖNEMİN ÖNCEKİ ANALİZİYLE KARŞILAŞTIRMA:")
+        self.log("-" * 50)
+        for week_label, old_count, new_count in self.history.compare_analyses(previous_id, analysis_id):
+            if old_count is None:
+                self.log(f"  • {week_label}: {new_count} (önceki analizde yok)")
+            else:
+                self.log(f"  • {week_label}: {old_count} → {new_count} ({new_count - old_count:+d})")
+    
+    def show_leaves_in_period(self):
+        """List stored leaves overlapping the selected period, latest version of each file"""
+        if self.history is None:
+            messagebox.showerror("Hata", "Geçmiş veritabanı kullanılamıyor!")
+            return
+        
+        start_date = self.parse_date(self.start_date_var.get())
+        end_date = self.parse_date(self.end_date_var.get())
+        
+        if not start_date or not end_date:
+            messagebox.showerror("Hata", "Geçerli tarih formatı: GG/AA/YYYY")
+            return
+        
+        try:
+            leaves = self.history.leaves_in_range(start_date, end_date)
+            
+            self.log(f"\n📚 GEÇMİŞ KAYITLARDAKİ İZİNLER: "
+                     f"{start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}")
+            self.log("=" * 50)
+            if not leaves:
+                self.log("  Bu dönemde kayıtlı izin bulunmuyor.")
+            for source, employee, leave_type, start, end in leaves:
+                self.log(f"  • {employee}: {leave_type} {start} - {end} ({os.path.basename(source)})")
+            self.log(f"\nToplam {len(leaves)} izin kaydı")
+            
+        except Exception as e:
+            error_msg = f"❌ Geçmiş sorgusu sırasında hata: {str(e)}"
+            self.log(error_msg)
+            messagebox.showerror("Hata", error_msg)
+    
+    def compare_with_snapshot(self):
+        """Let the user pick a stored snapshot to compare the current roster against"""
+        if self.history is None:
+            messagebox.showerror("Hata", "Geçmiş veritabanı kullanılamıyor!")
+            return
+        
+        if self.snapshot_id is None:
+            messagebox.showerror("Hata", "Önce veri yükleyip sütun eşleştirmesi yapın!")
+            return
+        
+        snapshots = [s for s in self.history.list_snapshots() if s[0] != self.snapshot_id]
+        if not snapshots:
+            messagebox.showinfo("Bilgi", "Karşılaştırılacak başka bir kayıt bulunmuyor.")
+            return
+        
+        labels = [f"{os.path.basename(source)} - sürüm {version} - {count} kişi - {created}"
+                  for _, source, version, count, created in snapshots]
+        
+        # Preselect the previous version of the same file, otherwise the newest snapshot
+        previous_id = self.history.previous_snapshot(self.snapshot_id)
+        selected = next((i for i, s in enumerate(snapshots) if s[0] == previous_id), 0)
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Geçmiş Kayıt Seçimi")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        frame = ttk.Frame(dialog, padding="15")
+        frame.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(frame, text="Karşılaştırılacak kayıt:").pack(anchor=tk.W, pady=5)
+        
+        combo = ttk.Combobox(frame, values=labels, state='readonly', width=70)
+        combo.current(selected)
+        combo.pack(fill=tk.X, pady=5)
+        
+        def on_compare():
+            index = combo.current()
+            dialog.destroy()
+            self.show_snapshot_diff(snapshots[index][0], labels[index])
+        
+        buttons = ttk.Frame(frame)
+        buttons.pack(pady=10)
+        ttk.Button(buttons, text="Karşılaştır", command=on_compare).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons, text="İptal", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+    
+    def show_snapshot_diff(self, old_id, old_label):
+        """Log differences between a stored snapshot and the current one"""
+        try:
+            diff = self.history.diff_snapshots(old_id, self.snapshot_id)
+            
+            self.log("\n🕘 GEÇMİŞ KAYITLA KARŞILAŞTIRMA")
+            self.log(f"📁 Karşılaştırılan: {old_label}")
+            self.log("=" * 50)
+            self.log(f"➕ Yeni çalışanlar: {len(diff['added_employees'])}")
+            for name in diff['added_employees']:
+                self.log(f"     • {name}")
+            self.log(f"➖ Ayrılan çalışanlar: {len(diff['removed_employees'])}")
+            for name in diff['removed_employees']:
+                self.log(f"     • {name}")
+            self.log(f"➕ Eklenen izinler: {len(diff['added_leaves'])}")
+            for employee, leave_type, start, end in diff['added_leaves']:
+                self.log(f"     • {employee}: {leave_type} {start} - {end}")
+            self.log(f"➖ Kaldırılan izinler: {len(diff['removed_leaves'])}")
+            for employee, leave_type, start, end in diff['removed_leaves']:
+                self.log(f"     • {employee}: {leave_type} {start} - {end}")
+            
+            self.status_var.set("✅ Karşılaştırma tamamlandı")
+            
+        except Exception as e:
+            error_msg = f"❌ Karşılaştırma sırasında hata: {str(e)}"
+            self.log(error_msg)
+            messagebox.showerror("Hata", error_msg)
+            self.status_var.set("❌ Karşılaştırma hatası")
+    
     def generate_weekly_data(self, start_date, end_date):
         """Generate weekly report data"""
         name_col = self.column_mapping['name']
@@ -448,7 +627,8 @@ class FlexibleLeaveAnalyzer:
         # Use landscape orientation for more space
         doc = SimpleDocTemplate(output_path, pagesize=landscape(A4), 
                               rightMargin=2*cm, leftMargin=2*cm, 
-                              topMargin=1.5*cm, bottomMargin=1.5*cm)
+                              topMargin=1.5*cm, bottomMargin=1.5*cm,
+                              pageCompression=1)
         
         styles = getSampleStyleSheet()
         story = []
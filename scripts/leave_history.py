@@ -0,0 +1,275 @@
+import os
+import sqlite3
+import hashlib
+import numbers
+from datetime import datetime
+
+import pandas as pd
+
+HISTORY_DB_NAME = "izin_gecmisi.db"
+
+# Excel stores dates as day counts from this epoch; 2958465 is 31/12/9999
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+EXCEL_MAX_SERIAL = 2958465
+
+class LeaveHistoryStore:
+    """Embedded SQLite store for roster snapshots, leave intervals and analyses"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source_file TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            employee_count INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            UNIQUE (source_file, version)
+        );
+        CREATE TABLE IF NOT EXISTS employees (
+            snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+            name TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS leaves (
+            snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+            employee TEXT NOT NULL,
+            leave_type TEXT NOT NULL,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS analyses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS analysis_weeks (
+            analysis_id INTEGER NOT NULL REFERENCES analyses(id) ON DELETE CASCADE,
+            week_index INTEGER NOT NULL,
+            week_label TEXT NOT NULL,
+            working_count INTEGER NOT NULL,
+            PRIMARY KEY (analysis_id, week_index)
+        );
+        CREATE TABLE IF NOT EXISTS analysis_employees (
+            analysis_id INTEGER NOT NULL REFERENCES analyses(id) ON DELETE CASCADE,
+            week_index INTEGER NOT NULL,
+            employee TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_employees_snapshot ON employees(snapshot_id, name);
+        CREATE INDEX IF NOT EXISTS idx_employees_name ON employees(name);
+        CREATE INDEX IF NOT EXISTS idx_leaves_employee ON leaves(employee, start_date, end_date);
+        CREATE INDEX IF NOT EXISTS idx_leaves_range ON leaves(snapshot_id, start_date, end_date);
+        CREATE INDEX IF NOT EXISTS idx_leaves_dates ON leaves(start_date, end_date);
+        CREATE INDEX IF NOT EXISTS idx_snapshots_source ON snapshots(source_file, id);
+        CREATE INDEX IF NOT EXISTS idx_analyses_period ON analyses(snapshot_id, start_date, end_date);
+        CREATE INDEX IF NOT EXISTS idx_analyses_dates ON analyses(start_date, end_date);
+        CREATE INDEX IF NOT EXISTS idx_analysis_employees ON analysis_employees(analysis_id, week_index);
+    """
+
+    LEAVE_COLUMNS = [
+        ('admin_start', 'admin_end', 'İdari İzin'),
+        ('annual_start', 'annual_end', 'Yıllık İzin')
+    ]
+
+    def __init__(self, db_path=None):
+        if db_path is None:
+            db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), HISTORY_DB_NAME)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def _to_iso(value):
+        """Convert a date-like cell to YYYY-MM-DD, or None if empty or unparseable"""
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, numbers.Real):
+            # Excel serial date (days since 1899-12-30); anything else is not a date
+            if pd.isna(value) or not 1 <= value <= EXCEL_MAX_SERIAL:
+                return None
+            parsed = EXCEL_EPOCH + pd.to_timedelta(int(value), unit='D')
+        else:
+            parsed = pd.to_datetime(value, errors='coerce')
+        if pd.isna(parsed):
+            return None
+        return parsed.strftime('%Y-%m-%d')
+
+    def _extract_rows(self, df, column_mapping):
+        """Build employee and leave rows from the mapped DataFrame"""
+        name_col = column_mapping['name']
+        employees = []
+        leaves = []
+
+        for _, row in df.iterrows():
+            name = str(row[name_col])
+            employees.append(name)
+            for start_key, end_key, leave_type in self.LEAVE_COLUMNS:
+                if start_key in column_mapping and end_key in column_mapping:
+                    start = self._to_iso(row[column_mapping[start_key]])
+                    end = self._to_iso(row[column_mapping[end_key]])
+                    if start and end:
+                        leaves.append((name, leave_type, start, end))
+
+        return employees, leaves
+
+    def save_snapshot(self, df, column_mapping, source_file):
+        """Save roster as a new version; returns (snapshot_id, version, is_new)"""
+        employees, leaves = self._extract_rows(df, column_mapping)
+
+        # Hash names and leaves in sorted order, so re-sorting the sheet is not a new version
+        digest = hashlib.sha256()
+        for name in sorted(employees):
+            digest.update(name.encode('utf-8') + b'\0')
+        for leave in sorted(leaves):
+            digest.update('|'.join(leave).encode('utf-8') + b'\0')
+        content_hash = digest.hexdigest()
+
+        source_file = os.path.abspath(source_file)
+        latest = self.conn.execute(
+            "SELECT id, version, content_hash FROM snapshots "
+            "WHERE source_file = ? ORDER BY version DESC LIMIT 1",
+            (source_file,)
+        ).fetchone()
+
+        # Unchanged roster: reuse the latest version instead of duplicating it
+        if latest and latest[2] == content_hash:
+            return latest[0], latest[1], False
+
+        version = latest[1] + 1 if latest else 1
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO snapshots (source_file, version, content_hash, employee_count, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (source_file, version, content_hash, len(employees),
+                 datetime.now().isoformat(timespec='seconds'))
+            )
+            snapshot_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO employees (snapshot_id, name) VALUES (?, ?)",
+                [(snapshot_id, name) for name in employees]
+            )
+            self.conn.executemany(
+                "INSERT INTO leaves (snapshot_id, employee, leave_type, start_date, end_date) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(snapshot_id,) + leave for leave in leaves]
+            )
+
+        return snapshot_id, version, True
+
+    def save_analysis(self, snapshot_id, start_date, end_date, weekly_data):
+        """Store weekly analysis results for a snapshot; returns (analysis_id, is_new)"""
+        start = start_date.strftime('%Y-%m-%d')
+        end = end_date.strftime('%Y-%m-%d')
+        existing = self.conn.execute(
+            "SELECT id FROM analyses WHERE snapshot_id = ? AND start_date = ? AND end_date = ?",
+            (snapshot_id, start, end)
+        ).fetchone()
+
+        # Same roster version and period always yield the same weeks
+        if existing:
+            return existing[0], False
+
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO analyses (snapshot_id, start_date, end_date, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (snapshot_id, start, end, datetime.now().isoformat(timespec='seconds'))
+            )
+            analysis_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO analysis_weeks (analysis_id, week_index, week_label, working_count) "
+                "VALUES (?, ?, ?, ?)",
+                [(analysis_id, i, week['week_label'], len(week['working_employees']))
+                 for i, week in enumerate(weekly_data)]
+            )
+            self.conn.executemany(
+                "INSERT INTO analysis_employees (analysis_id, week_index, employee) VALUES (?, ?, ?)",
+                [(analysis_id, i, employee)
+                 for i, week in enumerate(weekly_data)
+                 for employee in week['working_employees']]
+            )
+
+        return analysis_id, True
+
+    def list_snapshots(self, source_file=None):
+        """List snapshots (newest first) as (id, source_file, version, employee_count, created_at)"""
+        query = "SELECT id, source_file, version, employee_count, created_at FROM snapshots"
+        params = ()
+        if source_file:
+            query += " WHERE source_file = ?"
+            params = (os.path.abspath(source_file),)
+        query += " ORDER BY id DESC"
+        return self.conn.execute(query, params).fetchall()
+
+    def previous_snapshot(self, snapshot_id):
+        """Return the id of the previous version of the same source file, if any"""
+        row = self.conn.execute(
+            "SELECT prev.id FROM snapshots cur "
+            "JOIN snapshots prev ON prev.source_file = cur.source_file AND prev.version < cur.version "
+            "WHERE cur.id = ? ORDER BY prev.version DESC LIMIT 1",
+            (snapshot_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def leaves_in_range(self, start_date, end_date, snapshot_id=None):
+        """Leave intervals overlapping [start_date, end_date] as
+        (source_file, employee, leave_type, start_date, end_date).
+
+        Only the latest snapshot of each source file is searched unless
+        snapshot_id is given, so an interval is not repeated per version.
+        """
+        query = ("SELECT s.source_file, l.employee, l.leave_type, l.start_date, l.end_date "
+                 "FROM leaves l JOIN snapshots s ON s.id = l.snapshot_id "
+                 "WHERE l.start_date <= ? AND l.end_date >= ?")
+        params = [end_date.strftime('%Y-%m-%d'), start_date.strftime('%Y-%m-%d')]
+        if snapshot_id is not None:
+            query += " AND l.snapshot_id = ?"
+            params.append(snapshot_id)
+        else:
+            query += " AND l.snapshot_id IN (SELECT MAX(id) FROM snapshots GROUP BY source_file)"
+        query += " ORDER BY l.start_date, l.employee"
+        return self.conn.execute(query, params).fetchall()
+
+    def diff_snapshots(self, old_id, new_id):
+        """Compare two snapshots: employees and leave intervals added/removed"""
+        employee_diff = (
+            "SELECT name FROM employees WHERE snapshot_id = ? "
+            "EXCEPT SELECT name FROM employees WHERE snapshot_id = ? ORDER BY name"
+        )
+        leave_diff = (
+            "SELECT employee, leave_type, start_date, end_date FROM leaves WHERE snapshot_id = ? "
+            "EXCEPT SELECT employee, leave_type, start_date, end_date FROM leaves WHERE snapshot_id = ? "
+            "ORDER BY employee, start_date"
+        )
+        return {
+            'added_employees': [r[0] for r in self.conn.execute(employee_diff, (new_id, old_id))],
+            'removed_employees': [r[0] for r in self.conn.execute(employee_diff, (old_id, new_id))],
+            'added_leaves': self.conn.execute(leave_diff, (new_id, old_id)).fetchall(),
+            'removed_leaves': self.conn.execute(leave_diff, (old_id, new_id)).fetchall()
+        }
+
+    def previous_analysis(self, analysis_id):
+        """Return the latest earlier analysis of the same period on another snapshot, if any"""
+        row = self.conn.execute(
+            "SELECT prev.id FROM analyses cur "
+            "JOIN analyses prev ON prev.start_date = cur.start_date AND prev.end_date = cur.end_date "
+            "AND prev.snapshot_id <> cur.snapshot_id AND prev.id < cur.id "
+            "WHERE cur.id = ? ORDER BY prev.id DESC LIMIT 1",
+            (analysis_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def compare_analyses(self, old_analysis_id, new_analysis_id):
+        """Weekly working counts of two analyses side by side, matched by week label"""
+        return self.conn.execute(
+            "SELECT n.week_label, o.working_count, n.working_count "
+            "FROM analysis_weeks n LEFT JOIN analysis_weeks o "
+            "ON o.analysis_id = ? AND o.week_label = n.week_label "
+            "WHERE n.analysis_id = ? ORDER BY n.week_index",
+            (old_analysis_id, new_analysis_id)
+        ).fetchall()
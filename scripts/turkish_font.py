@@ -0,0 +1,188 @@
+import os
+import sys
+import hashlib
+import pickle
+import tempfile
+from fnmatch import fnmatch
+from weakref import WeakKeyDictionary
+
+import reportlab
+from reportlab import rl_config
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont, TTFontFace, TTEncoding
+
+# Turkish-capable fonts, in order of preference
+TURKISH_FONT_FILES = [
+    "DejaVuSans.ttf",
+    "LiberationSans-Regular.ttf",
+    "NotoSans-Regular.ttf",
+    "arial.ttf",
+    "Arial.ttf"
+]
+
+# reportlab releases whose TTFont.__init__ CachedTTFont mirrors; others parse the TTF directly
+CACHED_TTFONT_VERSIONS = ("5.0.",)
+
+# Resolved font name per process, so batch runs register the font only once
+_turkish_font_name = None
+
+class CachedTTFont(TTFont):
+    """TTFont built from an already parsed face instead of re-reading the TTF"""
+
+    def __init__(self, name, face, asciiReadable=None, shapable=True):
+        # Mirrors TTFont.__init__ from reportlab 5.0, minus the TTFontFace parsing
+        self.fontName = name
+        self.face = face
+        self.encoding = TTEncoding()
+        self.state = WeakKeyDictionary()
+        if asciiReadable is None:
+            asciiReadable = rl_config.ttfAsciiReadable
+        self._asciiReadable = asciiReadable
+        self.shapable = shapable and not any((fnmatch(name, _) for _ in rl_config.unShapedFontGlob))
+
+def get_font_search_dirs():
+    """Directories searched for a Turkish-capable TTF font"""
+    home = os.path.expanduser("~")
+    dirs = [
+        os.path.dirname(os.path.abspath(__file__)),
+        os.getcwd()
+    ]
+    if sys.platform.startswith("win"):
+        dirs.append(os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"))
+        local_app_data = os.environ.get("LOCALAPPDATA")
+        if local_app_data:
+            dirs.append(os.path.join(local_app_data, "Microsoft", "Windows", "Fonts"))
+    elif sys.platform == "darwin":
+        dirs.extend([
+            os.path.join(home, "Library", "Fonts"),
+            "/Library/Fonts",
+            "/System/Library/Fonts/Supplemental"
+        ])
+    else:
+        dirs.extend([
+            os.path.join(home, ".local", "share", "fonts"),
+            os.path.join(home, ".fonts"),
+            "/usr/share/fonts/truetype/dejavu",
+            "/usr/share/fonts/dejavu",
+            "/usr/share/fonts/TTF",
+            "/usr/share/fonts/truetype/liberation",
+            "/usr/share/fonts/truetype/noto",
+            "/usr/share/fonts/truetype/msttcorefonts"
+        ])
+    return dirs
+
+def find_turkish_fonts():
+    """Yield paths of all Turkish-capable fonts found, in order of preference"""
+    dirs = get_font_search_dirs()
+    for font_file in TURKISH_FONT_FILES:
+        for font_dir in dirs:
+            font_path = os.path.join(font_dir, font_file)
+            if os.path.isfile(font_path):
+                yield font_path
+
+def get_font_cache_dir():
+    """Per-user directory for parsed font metrics"""
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "izinduzenle", "fonts")
+
+def _font_cache_prefix(font_path):
+    """Cache file name prefix shared by all entries of one font path"""
+    digest = hashlib.sha1(os.path.abspath(font_path).encode("utf-8")).hexdigest()
+    return digest[:16] + "-"
+
+def _font_cache_path(font_path):
+    """Cache file keyed by font path, size, mtime and reportlab version"""
+    stat = os.stat(font_path)
+    key = f"{stat.st_size}|{stat.st_mtime_ns}|{reportlab.Version}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return os.path.join(get_font_cache_dir(), f"{_font_cache_prefix(font_path)}{digest[:16]}.pickle")
+
+def _pdf_scale(units_per_em):
+    """Glyph unit scaler dropped from the pickled face (it is a lambda)"""
+    if units_per_em == 1000:
+        return lambda x: x
+    factor = 1000 / units_per_em
+    return lambda x: x * factor
+
+def _load_font_face(font_path):
+    """Load parsed TTF metrics from the disk cache, parsing and caching on a miss"""
+    # The cache directory is per-user and trusted: unpickling runs code from it
+    try:
+        cache_path = _font_cache_path(font_path)
+        with open(cache_path, "rb") as f:
+            state = pickle.load(f)
+        face = TTFontFace.__new__(TTFontFace)
+        face.__dict__.update(state)
+        face._pdfScale = _pdf_scale(face.unitsPerEm)
+        return face
+    except Exception:
+        pass
+
+    face = TTFontFace(font_path)
+    try:
+        _write_font_cache(font_path, face)
+    except Exception:
+        pass
+    return face
+
+def _write_font_cache(font_path, face):
+    """Pickle a parsed face and drop stale entries of the same font path"""
+    state = dict(face.__dict__)
+    state.pop("_pdfScale", None)
+    cache_dir = get_font_cache_dir()
+    cache_path = _font_cache_path(font_path)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Write to a temp file and rename, so parallel workers never read a partial cache
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    prefix = _font_cache_prefix(font_path)
+    for entry in os.listdir(cache_dir):
+        entry_path = os.path.join(cache_dir, entry)
+        if entry.startswith(prefix) and entry.endswith(".pickle") and entry_path != cache_path:
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+
+def register_turkish_font():
+    """Register a Turkish-capable TTF once per process; returns the font name.
+
+    Every font found is tried in order of preference. Returns None when no
+    font file exists, and re-raises the last error when all of them fail.
+    """
+    global _turkish_font_name
+    if _turkish_font_name is not None:
+        return _turkish_font_name
+
+    error = None
+    for font_path in find_turkish_fonts():
+        font_name = os.path.splitext(os.path.basename(font_path))[0]
+        if font_name not in pdfmetrics.getRegisteredFontNames():
+            try:
+                if reportlab.Version.startswith(CACHED_TTFONT_VERSIONS):
+                    font = CachedTTFont(font_name, _load_font_face(font_path))
+                else:
+                    font = TTFont(font_name, font_path)
+            except Exception as e:
+                error = e
+                continue
+            pdfmetrics.registerFont(font)
+
+        _turkish_font_name = font_name
+        return font_name
+
+    if error is not None:
+        raise error
+    return None
@@ -0,0 +1,122 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "scripts"))
+
+from leave_history import LeaveHistoryStore
+
+MAPPING = {'name': 'Ad', 'admin_start': 'İdari Başlama', 'admin_end': 'İdari Bitiş'}
+
+
+def make_roster(rows):
+    return pd.DataFrame(rows, columns=['Ad', 'İdari Başlama', 'İdari Bitiş'])
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LeaveHistoryStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+
+def test_versions_increment_per_source_file(store):
+    first = make_roster([['Ayşe', '2025-07-01', '2025-07-10']])
+    second = make_roster([['Ayşe', '2025-07-01', '2025-07-12']])
+
+    assert store.save_snapshot(first, MAPPING, "ekim.xlsx")[1:] == (1, True)
+    assert store.save_snapshot(second, MAPPING, "ekim.xlsx")[1:] == (2, True)
+    assert store.save_snapshot(first, MAPPING, "kasim.xlsx")[1:] == (1, True)
+
+
+def test_unchanged_roster_reuses_latest_version(store):
+    roster = make_roster([['Ayşe', '2025-07-01', '2025-07-10'], ['Işık', None, None]])
+
+    snapshot_id, version, is_new = store.save_snapshot(roster, MAPPING, "ekim.xlsx")
+    assert store.save_snapshot(roster.copy(), MAPPING, "ekim.xlsx") == (snapshot_id, version, False)
+    assert len(store.list_snapshots()) == 1
+
+
+def test_invalid_and_serial_dates(store):
+    roster = make_roster([['Ayşe', 'abc', '2025-07-10'], ['Işık', 45870, 45872]])
+
+    snapshot_id, _, _ = store.save_snapshot(roster, MAPPING, "ekim.xlsx")
+    leaves = store.conn.execute(
+        "SELECT employee, start_date, end_date FROM leaves WHERE snapshot_id = ?", (snapshot_id,)
+    ).fetchall()
+    assert leaves == [('Işık', '2025-08-01', '2025-08-03')]
+
+
+def test_diff_snapshots(store):
+    old = make_roster([['Ayşe', '2025-07-01', '2025-07-10'], ['Burak', None, None]])
+    new = make_roster([['Ayşe', '2025-07-02', '2025-07-10'], ['Cem', None, None]])
+
+    old_id, _, _ = store.save_snapshot(old, MAPPING, "ekim.xlsx")
+    new_id, _, _ = store.save_snapshot(new, MAPPING, "kasim.xlsx")
+    diff = store.diff_snapshots(old_id, new_id)
+
+    assert diff['added_employees'] == ['Cem']
+    assert diff['removed_employees'] == ['Burak']
+    assert diff['added_leaves'] == [('Ayşe', 'İdari İzin', '2025-07-02', '2025-07-10')]
+    assert diff['removed_leaves'] == [('Ayşe', 'İdari İzin', '2025-07-01', '2025-07-10')]
+
+
+def test_repeated_analysis_is_not_duplicated(store):
+    roster = make_roster([['Ayşe', None, None]])
+    snapshot_id, _, _ = store.save_snapshot(roster, MAPPING, "ekim.xlsx")
+    weekly_data = [{'week_label': '21 July Haftası', 'working_employees': ['Ayşe']}]
+    start, end = datetime(2025, 7, 21), datetime(2025, 7, 27)
+
+    analysis_id, is_new = store.save_analysis(snapshot_id, start, end, weekly_data)
+    assert is_new
+    assert store.save_analysis(snapshot_id, start, end, weekly_data) == (analysis_id, False)
+    assert store.conn.execute("SELECT COUNT(*) FROM analysis_weeks").fetchone()[0] == 1
+
+
+def test_leaves_in_range_uses_latest_snapshot_per_file(store):
+    store.save_snapshot(make_roster([['Ayşe', '2025-07-01', '2025-07-10']]), MAPPING, "ekim.xlsx")
+    store.save_snapshot(make_roster([['Ayşe', '2025-07-03', '2025-07-10']]), MAPPING, "ekim.xlsx")
+    store.save_snapshot(make_roster([['Cem', '2025-08-01', '2025-08-05']]), MAPPING, "kasim.xlsx")
+
+    leaves = store.leaves_in_range(datetime(2025, 7, 5), datetime(2025, 7, 6))
+    assert [leave[1:] for leave in leaves] == [('Ayşe', 'İdari İzin', '2025-07-03', '2025-07-10')]
+
+
+def test_compare_with_previous_analysis_of_same_period(store):
+    start, end = datetime(2025, 7, 21), datetime(2025, 7, 27)
+    old_id, _, _ = store.save_snapshot(make_roster([['Ayşe', None, None]]), MAPPING, "ekim.xlsx")
+    new_id, _, _ = store.save_snapshot(make_roster([['Ayşe', None, None], ['Cem', None, None]]),
+                                       MAPPING, "kasim.xlsx")
+    old_analysis, _ = store.save_analysis(
+        old_id, start, end, [{'week_label': '21 July Haftası', 'working_employees': ['Ayşe']}])
+    new_analysis, _ = store.save_analysis(
+        new_id, start, end, [{'week_label': '21 July Haftası', 'working_employees': ['Ayşe', 'Cem']}])
+
+    assert store.previous_analysis(new_analysis) == old_analysis
+    assert store.compare_analyses(old_analysis, new_analysis) == [('21 July Haftası', 1, 2)]
+
+
+def test_reopened_snapshot_is_not_compared_with_a_newer_analysis(store):
+    start, end = datetime(2025, 7, 21), datetime(2025, 7, 27)
+    week = lambda names: [{'week_label': 'w', 'working_employees': names}]
+    a_id, _, _ = store.save_snapshot(make_roster([['Ayşe', None, None]]), MAPPING, "a.xlsx")
+    b_id, _, _ = store.save_snapshot(make_roster([['Ayşe', None, None], ['Cem', None, None]]),
+                                     MAPPING, "b.xlsx")
+    a_analysis, _ = store.save_analysis(a_id, start, end, week(['Ayşe']))
+    b_analysis, _ = store.save_analysis(b_id, start, end, week(['Ayşe', 'Cem']))
+
+    # Reopening a.xlsx reuses its stored analysis, which has no earlier run to compare with
+    assert store.save_analysis(a_id, start, end, week(['Ayşe'])) == (a_analysis, False)
+    assert store.previous_analysis(a_analysis) is None
+    assert store.previous_analysis(b_analysis) == a_analysis
+
+
+def test_resorted_roster_is_not_a_new_version(store):
+    rows = [['Ayşe', '2025-07-01', '2025-07-10'], ['Cem', '2025-08-01', '2025-08-05']]
+
+    snapshot = store.save_snapshot(make_roster(rows), MAPPING, "ekim.xlsx")
+    assert store.save_snapshot(make_roster(rows[::-1]), MAPPING, "ekim.xlsx") == snapshot[:2] + (False,)
@@ -0,0 +1,117 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+reportlab = pytest.importorskip("reportlab")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "scripts"))
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+import turkish_font
+
+VERA = os.path.join(os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf")
+SAMPLE = "Çalışan Şükrü Ağaoğlu İzinli"
+
+
+@pytest.fixture
+def font_dir(tmp_path, monkeypatch):
+    """Isolated font search directory, font cache and per-process font state"""
+    fonts = tmp_path / "fonts"
+    fonts.mkdir()
+    monkeypatch.setattr(turkish_font, "get_font_search_dirs", lambda: [str(fonts)])
+    monkeypatch.setattr(turkish_font, "get_font_cache_dir", lambda: str(tmp_path / "cache"))
+    monkeypatch.setattr(turkish_font, "_turkish_font_name", None)
+    yield fonts
+    for font_file in turkish_font.TURKISH_FONT_FILES:
+        name = os.path.splitext(font_file)[0]
+        if name in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.getFont(name).unregister()
+
+
+def cache_entries():
+    return sorted(os.listdir(turkish_font.get_font_cache_dir()))
+
+
+def test_cache_hit_matches_parsed_font(font_dir, monkeypatch):
+    font_path = shutil.copy(VERA, font_dir / "DejaVuSans.ttf")
+    parsed = turkish_font._load_font_face(font_path)
+    assert cache_entries() == [os.path.basename(turkish_font._font_cache_path(font_path))]
+
+    class NoParseFace(turkish_font.TTFontFace):
+        def __init__(self, *args, **kwargs):
+            raise AssertionError("font was parsed instead of loaded from cache")
+
+    monkeypatch.setattr(turkish_font, "TTFontFace", NoParseFace)
+    cached = turkish_font._load_font_face(font_path)
+
+    expected = TTFont("VeraReference", font_path).stringWidth(SAMPLE, 10)
+    assert turkish_font.CachedTTFont("VeraParsed", parsed).stringWidth(SAMPLE, 10) == expected
+    assert turkish_font.CachedTTFont("VeraCached", cached).stringWidth(SAMPLE, 10) == expected
+
+
+def test_corrupt_cache_is_reparsed_and_rewritten(font_dir):
+    font_path = shutil.copy(VERA, font_dir / "DejaVuSans.ttf")
+    cache_path = turkish_font._font_cache_path(font_path)
+    os.makedirs(os.path.dirname(cache_path))
+    with open(cache_path, "wb") as f:
+        f.write(b"not a pickle")
+
+    face = turkish_font._load_font_face(font_path)
+    assert face.unitsPerEm == TTFont("VeraReference", font_path).face.unitsPerEm
+    with open(cache_path, "rb") as f:
+        assert f.read() != b"not a pickle"
+    assert turkish_font._load_font_face(font_path).charWidths == face.charWidths
+
+
+def test_stale_entries_of_same_font_are_pruned(font_dir):
+    font_path = shutil.copy(VERA, font_dir / "DejaVuSans.ttf")
+    cache_dir = turkish_font.get_font_cache_dir()
+    os.makedirs(cache_dir)
+    stale = turkish_font._font_cache_prefix(font_path) + "0000000000000000.pickle"
+    other = turkish_font._font_cache_prefix(str(font_dir / "arial.ttf")) + "0000000000000000.pickle"
+    for entry in (stale, other):
+        open(os.path.join(cache_dir, entry), "wb").close()
+
+    turkish_font._load_font_face(font_path)
+    assert cache_entries() == sorted([other, os.path.basename(turkish_font._font_cache_path(font_path))])
+
+
+def test_other_reportlab_versions_use_plain_ttfont(font_dir, monkeypatch):
+    shutil.copy(VERA, font_dir / "DejaVuSans.ttf")
+    monkeypatch.setattr(turkish_font.reportlab, "Version", "4.2.5")
+
+    assert turkish_font.register_turkish_font() == "DejaVuSans"
+    assert type(pdfmetrics.getFont("DejaVuSans")) is TTFont
+    assert not os.path.exists(turkish_font.get_font_cache_dir())
+
+
+def test_supported_reportlab_version_uses_cached_font(font_dir, monkeypatch):
+    shutil.copy(VERA, font_dir / "DejaVuSans.ttf")
+    monkeypatch.setattr(turkish_font.reportlab, "Version", "5.0.1")
+
+    assert turkish_font.register_turkish_font() == "DejaVuSans"
+    assert isinstance(pdfmetrics.getFont("DejaVuSans"), turkish_font.CachedTTFont)
+
+
+def test_broken_font_falls_back_to_next_candidate(font_dir):
+    (font_dir / "DejaVuSans.ttf").write_bytes(b"not a font")
+    shutil.copy(VERA, font_dir / "LiberationSans-Regular.ttf")
+
+    assert turkish_font.register_turkish_font() == "LiberationSans-Regular"
+    assert "DejaVuSans" not in pdfmetrics.getRegisteredFontNames()
+
+
+def test_all_fonts_broken_raises_last_error(font_dir):
+    (font_dir / "DejaVuSans.ttf").write_bytes(b"not a font")
+
+    with pytest.raises(Exception):
+        turkish_font.register_turkish_font()
+    assert turkish_font._turkish_font_name is None
+
+
+def test_no_font_found_returns_none(font_dir):
+    assert turkish_font.register_turkish_font() is None